@@ -4,33 +4,728 @@ LLM-powered test case generation with context extraction from multiple sources
 """
 
 import os
-import json
+import re
+import copy
+import math
+import time
+import random
+import hashlib
 import asyncio
-import aiohttp
-import requests
-from typing import Dict, List, Any, Optional
-from bs4 import BeautifulSoup
-import yaml
+import functools
+import aiometer
+import httpx
+from collections import OrderedDict, deque
+from typing import Dict, List, Any, Optional, Tuple
+import orjson
 from pathlib import Path
 
-# LLM API imports
-try:
-    import openai
-    from anthropic import Anthropic
-    print(f"✅ OpenAI library version: {openai.__version__}")
-except ImportError as e:
-    print(f"❌ Failed to import LLM libraries: {e}")
-    openai = None
-    Anthropic = None
+from config import get_settings
+
+# bs4, yaml and the LLM SDKs are imported where they are first needed so that
+# importing this module (and starting a worker) doesn't pay for all of them
+
+@functools.cache
+def _llm_libraries() -> Tuple[Any, Any]:
+    """Import the LLM SDKs on first use; returns (openai, AsyncAnthropic), None where missing"""
+    try:
+        import openai
+        from anthropic import AsyncAnthropic
+        print(f"✅ OpenAI library version: {openai.__version__}")
+        return openai, AsyncAnthropic
+    except ImportError as e:
+        print(f"❌ Failed to import LLM libraries: {e}")
+        return None, None
+
+# Jira search returns at most 100 issues per page; only the fields the prompt uses are requested
+JIRA_SEARCH_BATCH_SIZE = 100
+JIRA_ISSUE_FIELDS = "summary,description,issuetype,status"
+JIRA_CACHE_TTL_SECONDS = 300
+# Rate-limited (429) and transient 5xx/transport failures are retried with exponential backoff
+JIRA_MAX_ATTEMPTS = 5
+JIRA_RETRY_MAX_DELAY = 30.0
+JIRA_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Prompt size limits: how many forms/inputs/items reach the prompt and how long any one field may be
+PROMPT_MAX_FORMS = 3
+PROMPT_MAX_FORM_INPUTS = 10
+PROMPT_MAX_ITEMS = 10
+PROMPT_FIELD_MAX_CHARS = 1000
+
+# Largest page body extract_url_context will download
+MAX_HTML_BYTES = 5 * 1024 * 1024
+
+# Most links/inputs/buttons kept per page; extraction stops building entries past these
+MAX_URL_LINKS = 50
+MAX_URL_INPUTS = 200
+MAX_URL_BUTTONS = 200
+# Page contexts are reused for a short window, then revalidated with a conditional GET
+URL_CACHE_FRESH_SECONDS = 300
+URL_CACHE_TTL_SECONDS = 3600
+
+_HEADING_TAGS = frozenset({'h1', 'h2', 'h3', 'h4', 'h5', 'h6'})
+_NAV_TAGS = frozenset({'nav', 'ul', 'ol'})
+_URL_CONTEXT_TAGS = ('form', 'input', 'a', 'button', *sorted(_HEADING_TAGS), *sorted(_NAV_TAGS))
+_NAV_CLASS_RE = re.compile(r'nav|menu|breadcrumb', re.I)
+
+# Acceptance criteria: the run of bullet ("*", "-", "•", "1."-"3."), blank or repeated-heading
+# lines following the first "Acceptance Criteria" line, and the bullet items within it
+_AC_SECTION_RE = re.compile(
+    r'Acceptance Criteria[^\n]*(?:\n|\Z)'
+    r'((?:[^\S\n]*(?:(?:[*\-•]|[123]\.)[^\n]*|[^\n]*Acceptance Criteria[^\n]*)?(?:\n|\Z))*)'
+)
+_AC_ITEM_RE = re.compile(r'^[^\S\n]*(?![^\n]*Acceptance Criteria)((?:[*\-•]|[123]\.)[^\n]*?)[^\S\n]*$', re.M)
+
+# Characters stripped from feature names before they become file/class names
+# (\w is exactly str.isalnum() plus underscore)
+_UNSAFE_NAME_CHARS_RE = re.compile(r'[^\w \-]+')
+
+# Jira issue keys (after upper-casing); anything else never reaches JQL or a URL path
+_JIRA_ISSUE_KEY_RE = re.compile(r'[A-Z][A-Z0-9_]*-\d+')
+
+# Any line opening or closing a fenced block in LLM output
+_FENCE_LINE_RE = re.compile(r'^```.*$', re.M)
+
+@functools.lru_cache(maxsize=128)
+def _load_file(path: str, mtime_ns: int, size: int, structured_as: Optional[str]) -> Tuple[str, Any]:
+    """Read and parse a context file once per (path, mtime, size); returns (text, structured data)"""
+    text = Path(path).read_text(encoding='utf-8')
+    if structured_as == "yaml":
+        import yaml
+        # libyaml's C loader when available, the pure-Python one otherwise
+        return text, yaml.load(text, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    if structured_as == "json":
+        return text, orjson.loads(text)
+    return text, {}
+
+@functools.cache
+def _html_tools() -> Tuple[Any, Any, Any]:
+    """Import the HTML parsing pieces on first use: (EncodingDetector, lxml HTMLParser, visible-text XPath)"""
+    from bs4.dammit import EncodingDetector
+    from lxml import etree, html
+    # The strings BeautifulSoup's get_text() returns: script/style/template and ruby
+    # annotation text are excluded, as are comments
+    visible_text = etree.XPath(
+        './/text()[not(ancestor::script or ancestor::style or ancestor::template or ancestor::rt or ancestor::rp)]',
+        smart_strings=False
+    )
+    return EncodingDetector, html.HTMLParser, visible_text
+
+def _extract_primary_url(context: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+    """(url, page title) of the first URL context source, or empty strings if there is none"""
+    sources = context.get("context_sources") if context else None
+    source = next(
+        (s for s in sources or () if s.get("type") == "url" and s.get("extracted") and s["extracted"].get("url")),
+        None
+    )
+    if source is None:
+        return "", ""
+    return source["extracted"]["url"], source["extracted"].get("title") or ""
+
+class TTLCache:
+    """In-process TTL/LRU cache keyed by a hash of the request (LLM responses, Jira issues, page contexts)"""
+    
+    def __init__(self, ttl: int = 7 * 86400, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        """Hash the keyword arguments that identify a request"""
+        return hashlib.sha256(orjson.dumps(request, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+# Shared by all generator instances; only near-deterministic requests are cached
+llm_cache = TTLCache()
+CACHEABLE_MAX_TEMPERATURE = 0.1
+
+# The OpenAI and Anthropic SDKs retry 429/5xx themselves with backoff and honor Retry-After
+LLM_MAX_RETRIES = 5
+
+# One client per (provider, key digest, base URL). Unbounded on purpose: evicting a client
+# could close a pool an in-flight generation is still using. close_llm_clients() runs at shutdown.
+_llm_clients: Dict[Tuple[str, str, Optional[str]], Any] = {}
+
+def _shared_llm_client(provider: str, api_key: str, base_url: Optional[str] = None):
+    """Build an LLM client once per credential set, so every generator reuses its connection pool"""
+    client_key = (provider, hashlib.sha256(api_key.encode()).hexdigest(), base_url)
+    client = _llm_clients.get(client_key)
+    if client is None:
+        openai, AsyncAnthropic = _llm_libraries()
+        if provider == "openai":
+            client = openai.AsyncOpenAI(api_key=api_key, max_retries=LLM_MAX_RETRIES)
+        else:
+            client = AsyncAnthropic(api_key=api_key, base_url=base_url, max_retries=LLM_MAX_RETRIES)
+        _llm_clients[client_key] = client
+    return client
+
+async def close_llm_clients():
+    """Close every shared LLM client and its connection pool"""
+    clients = list(_llm_clients.values())
+    _llm_clients.clear()
+    for client in clients:
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"⚠️  Failed to close LLM client: {e}")
+
+class SemanticCache:
+    """Nearest-neighbour cache over prompt embeddings, for near-duplicate prompts"""
+    
+    def __init__(self, threshold: float = 0.92, max_scopes: int = 32, entries_per_scope: int = 8):
+        self.threshold = threshold
+        self.max_scopes = max_scopes
+        self.entries_per_scope = entries_per_scope
+        # Entries are grouped by scope so a lookup only compares against its own few vectors
+        self._scopes: "OrderedDict[str, deque[Tuple[List[float], str]]]" = OrderedDict()
+    
+    @staticmethod
+    def scope(feature_name: str, context: Dict[str, Any], config: Dict[str, Any]) -> str:
+        """Hash of what must match exactly for a hit: owner, feature, context sources and model settings"""
+        sources = [
+            {"type": source.get("type"), "config": source.get("config")}
+            for source in context.get("context_sources", [])
+        ]
+        return TTLCache.make_key(
+            # The cache is process-wide, so responses never cross users or projects
+            user_id=context.get("user_id"),
+            project_id=context.get("project_id"),
+            feature_name=feature_name,
+            project_context=context.get("project_context"),
+            sources=sources,
+            llm_provider=config.get("llm_provider", "openai"),
+            model=config.get("model"),
+            max_tokens=config.get("max_tokens", 4000),
+            temperature=config.get("temperature", 0.1)
+        )
+    
+    @staticmethod
+    def _normalize(vector: List[float]) -> List[float]:
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+    
+    def _best_match(self, entries: Tuple[Tuple[List[float], str], ...], vector: List[float]) -> Optional[str]:
+        unit = self._normalize(vector)
+        best, best_similarity = None, self.threshold
+        for entry_vector, content in entries:
+            similarity = sum(a * b for a, b in zip(unit, entry_vector))
+            if similarity >= best_similarity:
+                best, best_similarity = content, similarity
+        return best
+    
+    async def lookup(self, scope: str, vector: List[float]) -> Optional[str]:
+        """Return the cached response whose prompt is most similar, if above the threshold"""
+        entries = self._scopes.get(scope)
+        if not entries:
+            return None
+        self._scopes.move_to_end(scope)
+        # Snapshot on the loop; the cosine scan over ~1.5k-dim vectors runs in a worker thread
+        return await asyncio.to_thread(self._best_match, tuple(entries), vector)
+    
+    def add(self, scope: str, vector: List[float], content: str):
+        entries = self._scopes.get(scope)
+        if entries is None:
+            entries = self._scopes[scope] = deque(maxlen=self.entries_per_scope)
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        else:
+            self._scopes.move_to_end(scope)
+        entries.append((self._normalize(vector), content))
+
+semantic_cache = SemanticCache()
+SEMANTIC_CACHE_EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_MAX_PROMPT_CHARS = 24000  # stay under the embedding model's input limit
+
+GENERATION_PREAMBLE = """You are an expert QA automation engineer. Generate comprehensive Cucumber Selenium Java test cases for the feature and context described after these instructions.
+
+## Test Generation Requirements:
+
+1. **Generate a complete Maven project structure** with:
+   - pom.xml with all necessary dependencies
+   - TestRunner class for Cucumber execution
+   - Page Object Model classes
+   - Step definition classes
+   - Feature files with Gherkin scenarios
+
+2. **Test Coverage**:
+   - Happy path scenarios
+   - Edge cases and error conditions
+   - Security tests (if applicable)
+   - Performance considerations
+   - Cross-browser compatibility
+
+3. **Code Quality**:
+   - Follow Java best practices
+   - Use proper naming conventions
+   - Include comprehensive comments
+   - Implement proper error handling
+   - Use Page Object Model pattern
+
+4. **Configuration**:
+   - Support for different browsers (Chrome, Firefox, Edge)
+   - Configurable test data
+   - Environment-specific configurations
+   - Parallel execution support
+
+## Output Format:
+Generate the complete test suite as a structured response with each file clearly marked with its path and content.
+
+Generate comprehensive, production-ready test cases that cover all the requirements and context provided.
+"""
+
+# Mock output used when no LLM is configured; str.format placeholders, literal braces doubled
+_MOCK_TEMPLATE = """# Mock Test Generation for: {feature_name}
+
+## Generated Test Files:
+
+```pom.xml
+<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0"
+         xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+         xsi:schemaLocation="http://maven.apache.org/POM/4.0.0 
+         http://maven.apache.org/xsd/maven-4.0.0.xsd">
+    <modelVersion>4.0.0</modelVersion>
+    
+    <groupId>com.testgen</groupId>
+    <artifactId>selenium-cucumber-tests</artifactId>
+    <version>1.0.0</version>
+    <packaging>jar</packaging>
+    
+    <properties>
+        <maven.compiler.source>11</maven.compiler.source>
+        <maven.compiler.target>11</maven.compiler.target>
+        <project.build.sourceEncoding>UTF-8</project.build.sourceEncoding>
+    </properties>
+    
+    <dependencies>
+        <dependency>
+            <groupId>io.cucumber</groupId>
+            <artifactId>cucumber-java</artifactId>
+            <version>7.14.0</version>
+        </dependency>
+        <dependency>
+            <groupId>io.cucumber</groupId>
+            <artifactId>cucumber-junit</artifactId>
+            <version>7.14.0</version>
+        </dependency>
+        <dependency>
+            <groupId>org.seleniumhq.selenium</groupId>
+            <artifactId>selenium-java</artifactId>
+            <version>4.15.0</version>
+        </dependency>
+        <dependency>
+            <groupId>io.github.bonigarcia</groupId>
+            <artifactId>webdrivermanager</artifactId>
+            <version>5.5.3</version>
+        </dependency>
+        <dependency>
+            <groupId>org.junit.jupiter</groupId>
+            <artifactId>junit-jupiter</artifactId>
+            <version>5.10.0</version>
+        </dependency>
+    </dependencies>
+</project>
+```
+
+```src/test/java/TestRunner.java
+package com.testgen;
+
+import io.cucumber.junit.Cucumber;
+import io.cucumber.junit.CucumberOptions;
+import org.junit.runner.RunWith;
+
+@RunWith(Cucumber.class)
+@CucumberOptions(
+    features = "src/test/resources/features",
+    glue = "com.testgen.stepdefinitions",
+    plugin = {{"pretty", "html:target/cucumber-reports", "json:target/cucumber-reports/Cucumber.json"}},
+    monochrome = true
+)
+public class TestRunner {{
+}}
+```
+
+```src/test/resources/features/{clean_name}.feature
+Feature: {feature_name}
+  As a user
+  I want to test the {feature_name} functionality
+  So that I can ensure it works correctly
+
+  Scenario: Basic functionality test
+    Given I am on the page at "{base_url}"
+    When I perform the main action
+    Then I should see the expected result
+
+  Scenario: Error handling test
+    Given I am on the page at "{base_url}"
+    When I perform an invalid action
+    Then I should see an error message
+```
+
+```src/test/java/stepdefinitions/{clean_name}_steps.java
+package com.testgen.stepdefinitions;
+
+import io.cucumber.java.en.Given;
+import io.cucumber.java.en.When;
+import io.cucumber.java.en.Then;
+import org.junit.Assert;
+
+public class {clean_name_title}Steps {{
+    
+    @Given("I am on the page at {{string}}")
+    public void i_am_on_the_page(String url) {{
+        // TODO: Implement navigation to the specified URL
+        System.out.println("Navigating to " + url + "...");
+    }}
+    
+    @When("I perform the main action")
+    public void i_perform_the_main_action() {{
+        // TODO: Implement main action
+        System.out.println("Performing main action...");
+    }}
+    
+    @When("I perform an invalid action")
+    public void i_perform_an_invalid_action() {{
+        // TODO: Implement invalid action
+        System.out.println("Performing invalid action...");
+    }}
+    
+    @Then("I should see the expected result")
+    public void i_should_see_the_expected_result() {{
+        // TODO: Implement verification
+        Assert.assertTrue("Expected result not found", true);
+    }}
+    
+    @Then("I should see an error message")
+    public void i_should_see_an_error_message() {{
+        // TODO: Implement error verification
+        Assert.assertTrue("Error message not found", true);
+    }}
+}}
+```
+
+```README.md
+# {feature_name} Test Suite
+
+## Overview
+This test suite was generated by TestGen AI for testing the {feature_name} functionality.
+
+## Prerequisites
+- Java 11 or higher
+- Maven 3.6 or higher
+- Chrome/Firefox/Edge browser
+
+## Running Tests
+```bash
+mvn clean test
+```
+
+## Test Reports
+Test reports will be generated in the `target/cucumber-reports` directory.
+
+## Note
+This is a mock test suite generated for development purposes. 
+To generate real test cases, configure your LLM API keys in the environment variables.
+```
+
+## Context Information Used:
+{context_json}
+
+## Configuration Used:
+{config_json}
+"""
+
+# Fallback project files used when LLM output can't be parsed into files.
+# The *_TEMPLATE strings are str.format templates with literal braces doubled.
+_DEFAULT_POM_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0"
+         xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+         xsi:schemaLocation="http://maven.apache.org/POM/4.0.0 
+         http://maven.apache.org/xsd/maven-4.0.0.xsd">
+    <modelVersion>4.0.0</modelVersion>
+    
+    <groupId>com.testgen</groupId>
+    <artifactId>selenium-cucumber-tests</artifactId>
+    <version>1.0.0</version>
+    <packaging>jar</packaging>
+    
+    <properties>
+        <maven.compiler.source>11</maven.compiler.source>
+        <maven.compiler.target>11</maven.compiler.target>
+        <project.build.sourceEncoding>UTF-8</project.build.sourceEncoding>
+    </properties>
+    
+    <dependencies>
+        <dependency>
+            <groupId>io.cucumber</groupId>
+            <artifactId>cucumber-java</artifactId>
+            <version>7.14.0</version>
+        </dependency>
+        <dependency>
+            <groupId>io.cucumber</groupId>
+            <artifactId>cucumber-junit</artifactId>
+            <version>7.14.0</version>
+        </dependency>
+        <dependency>
+            <groupId>org.seleniumhq.selenium</groupId>
+            <artifactId>selenium-java</artifactId>
+            <version>4.15.0</version>
+        </dependency>
+        <dependency>
+            <groupId>io.github.bonigarcia</groupId>
+            <artifactId>webdrivermanager</artifactId>
+            <version>5.5.3</version>
+        </dependency>
+        <dependency>
+            <groupId>org.junit.jupiter</groupId>
+            <artifactId>junit-jupiter</artifactId>
+            <version>5.10.0</version>
+        </dependency>
+    </dependencies>
+    
+    <build>
+        <plugins>
+            <plugin>
+                <groupId>org.apache.maven.plugins</groupId>
+                <artifactId>maven-compiler-plugin</artifactId>
+                <version>3.11.0</version>
+            </plugin>
+            <plugin>
+                <groupId>org.apache.maven.plugins</groupId>
+                <artifactId>maven-surefire-plugin</artifactId>
+                <version>3.1.2</version>
+            </plugin>
+        </plugins>
+    </build>
+</project>"""
+
+_DEFAULT_TEST_RUNNER = """package com.testgen;
+
+import io.cucumber.junit.Cucumber;
+import io.cucumber.junit.CucumberOptions;
+import org.junit.runner.RunWith;
+
+@RunWith(Cucumber.class)
+@CucumberOptions(
+    features = "src/test/resources/features",
+    glue = "com.testgen.stepdefinitions",
+    plugin = {"pretty", "html:target/cucumber-reports", "json:target/cucumber-reports/Cucumber.json"},
+    monochrome = true
+)
+public class TestRunner {
+}"""
+
+_DEFAULT_BASE_PAGE = """package com.testgen.pages;
+
+import org.openqa.selenium.WebDriver;
+import org.openqa.selenium.WebElement;
+import org.openqa.selenium.support.PageFactory;
+import org.openqa.selenium.support.ui.WebDriverWait;
+import org.openqa.selenium.support.ui.ExpectedConditions;
+import java.time.Duration;
+
+public class BasePage {
+    protected WebDriver driver;
+    protected WebDriverWait wait;
+    
+    public BasePage(WebDriver driver) {
+        this.driver = driver;
+        this.wait = new WebDriverWait(driver, Duration.ofSeconds(10));
+        PageFactory.initElements(driver, this);
+    }
+    
+    protected void waitForElement(WebElement element) {
+        wait.until(ExpectedConditions.visibilityOf(element));
+    }
+    
+    protected void clickElement(WebElement element) {
+        waitForElement(element);
+        element.click();
+    }
+    
+    protected void enterText(WebElement element, String text) {
+        waitForElement(element);
+        element.clear();
+        element.sendKeys(text);
+    }
+}"""
+
+# Fallback step definitions, split around the class name and joined rather than formatted
+_DEFAULT_STEP_DEFINITIONS_HEAD = """package com.testgen.stepdefinitions;
+
+import io.cucumber.java.en.Given;
+import io.cucumber.java.en.When;
+import io.cucumber.java.en.Then;
+import io.cucumber.java.en.And;
+import org.junit.Assert;
+
+public class """
+_DEFAULT_STEP_DEFINITIONS_TAIL = """Steps {
+    
+    @Given("I am on the application homepage")
+    public void i_am_on_the_application_homepage() {
+        // Implementation for navigating to homepage
+    }
+    
+    @When("I perform the main action")
+    public void i_perform_the_main_action() {
+        // Implementation for main action
+    }
+    
+    @Then("I should see the expected result")
+    public void i_should_see_the_expected_result() {
+        // Implementation for verification
+        Assert.assertTrue("Expected result not found", true);
+    }
+}"""
+
+@functools.lru_cache(maxsize=256)
+def _render_step_definitions(feature_name: str) -> str:
+    """Fallback step definitions for a cleaned feature name, rendered once per name"""
+    return "".join((_DEFAULT_STEP_DEFINITIONS_HEAD, feature_name.title().replace('_', ''), _DEFAULT_STEP_DEFINITIONS_TAIL))
+
+# Fallback scenarios as (name, steps); every step is a str.format template over the feature file params
+_DEFAULT_SCENARIOS = (
+    ("Basic functionality test", (
+        "Given I am on {base_url}",
+        "When I perform the main action",
+        "Then I should see the expected result",
+    )),
+    ("Error handling test", (
+        "Given I am on {base_url}",
+        "When I perform an invalid action",
+        "Then I should see an error message",
+    )),
+)
+
+def _render_scenario(name: str, steps: Tuple[str, ...], params: Dict[str, str]) -> str:
+    """Render one indented Gherkin scenario block"""
+    return "".join([f"  Scenario: {name}"] + [f"\n    {step.format_map(params)}" for step in steps])
+
+@functools.lru_cache(maxsize=256)
+def _render_default_scenarios(start_page: str) -> str:
+    """All fallback scenarios for one start page, rendered once per page"""
+    params = {"base_url": start_page}
+    return "\n\n".join(_render_scenario(name, steps, params) for name, steps in _DEFAULT_SCENARIOS)
+
+_DEFAULT_FEATURE_FILE_TEMPLATE = """Feature: {feature_title}
+  As a user
+  I want to test the {feature_spaced} functionality
+  So that I can ensure it works correctly
+
+{scenarios}
+
+  # Generated based on context:
+  # {content_preview}..."""
+
+_DEFAULT_CONFIG_HEAD = """# Test Configuration
+browser=chrome
+base.url="""
+
+_DEFAULT_CONFIG_TAIL = """
+timeout=10
+headless=false
+
+# Browser configurations
+chrome.driver.path=
+firefox.driver.path=
+edge.driver.path=
+
+# Test data
+test.data.path=src/test/resources/testdata/"""
+
+_DEFAULT_README_TEMPLATE = """# {feature_title} Test Suite
+
+## Overview
+This test suite was generated by TestGen AI for testing the {feature_spaced} functionality.
+
+## Prerequisites
+- Java 11 or higher
+- Maven 3.6 or higher
+- Chrome/Firefox/Edge browser
+
+## Running Tests
+```bash
+mvn clean test
+```
+
+## Test Reports
+Test reports will be generated in the `target/cucumber-reports` directory.
+
+## Configuration
+Update `src/test/resources/config.properties` with your application settings.
+"""
+
+@functools.lru_cache(maxsize=256)
+def _render_readme(feature_name: str) -> str:
+    """Fallback README for a cleaned feature name, rendered once per name"""
+    feature_spaced = feature_name.replace('_', ' ')
+    return _DEFAULT_README_TEMPLATE.format(feature_title=feature_spaced.title(), feature_spaced=feature_spaced)
+
+# Fallback project layout: (path template, getter method, getter argument names)
+_DEFAULT_FILE_LAYOUT = (
+    ("pom.xml", "_get_default_pom", ()),
+    ("src/test/java/TestRunner.java", "_get_default_test_runner", ("clean_name",)),
+    ("src/test/java/pages/BasePage.java", "_get_default_base_page", ()),
+    ("src/test/java/stepdefinitions/{clean_name}_steps.java", "_get_default_step_definitions", ("clean_name",)),
+    ("src/test/resources/features/{clean_name}.feature", "_get_default_feature_file", ("clean_name", "content", "base_url", "page_title")),
+    ("src/test/resources/config.properties", "_get_default_config", ("base_url",)),
+    ("README.md", "_get_default_readme", ("clean_name",)),
+)
+
+def _retry_delay(response: Optional[httpx.Response], attempt: int) -> float:
+    """Seconds to wait before the next attempt, preferring the server's Retry-After hint"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), JIRA_RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            return JIRA_RETRY_MAX_DELAY
+    # Full jitter keeps concurrent batches from retrying in lockstep
+    return random.uniform(0, min(JIRA_RETRY_MAX_DELAY, 2 ** attempt))
 
 class ContextExtractor:
     """Extract context from various sources"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        # One pooled HTTP/2 client for Jira and page fetches; requests to the same host multiplex
+        self.client = httpx.AsyncClient(
+            http2=True,
+            # Fail fast on unreachable hosts instead of spending the whole budget connecting
+            timeout=httpx.Timeout(30, connect=5),
+            follow_redirects=True,
+            # Idle sockets stay warm for 30s so back-to-back extractions skip TCP/TLS setup
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30),
+            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+        )
+        # Recently fetched Jira issues, so re-extracting the same keys skips the round trip
+        self.jira_cache = TTLCache(ttl=JIRA_CACHE_TTL_SECONDS, max_entries=1024)
+        # Parsed page contexts with the ETag/Last-Modified validators they were fetched with
+        self.url_cache = TTLCache(ttl=URL_CACHE_TTL_SECONDS, max_entries=256)
+    
+    async def aclose(self):
+        """Close the underlying HTTP client"""
+        await self.client.aclose()
     
     async def extract_jira_context(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Extract context from Jira issues"""
@@ -43,6 +738,12 @@ class ContextExtractor:
             if not all([jira_url, username, api_token, issue_keys]):
                 raise ValueError("Missing required Jira configuration")
             
+            # Jira keys are case-insensitive; match requested and returned keys in upper case
+            issue_keys = [str(key).strip().upper() for key in issue_keys]
+            invalid_keys = [key for key in issue_keys if not _JIRA_ISSUE_KEY_RE.fullmatch(key)]
+            if invalid_keys:
+                raise ValueError(f"Invalid Jira issue keys: {', '.join(invalid_keys)}")
+            
             context = {
                 "source": "jira",
                 "issues": [],
@@ -51,20 +752,75 @@ class ContextExtractor:
                 "acceptance_criteria": []
             }
             
-            # Fetch issues from Jira
-            for issue_key in issue_keys:
-                issue_data = await self._fetch_jira_issue(jira_url, username, api_token, issue_key)
+            # Serve recently fetched issues from the cache; keys cover the credentials so
+            # one user's cached issues are never returned for another user's token
+            cache_keys = {
+                issue_key: TTLCache.make_key(jira_url=jira_url, username=username, api_token=api_token, issue_key=issue_key)
+                for issue_key in issue_keys
+            }
+            found = {}
+            for issue_key, cache_key in cache_keys.items():
+                cached = await self.jira_cache.get(cache_key)
+                if cached is not None:
+                    # Stored serialized so every hit hands the caller its own copy to mutate
+                    found[issue_key] = orjson.loads(cached)
+            missing = [issue_key for issue_key in cache_keys if issue_key not in found]
+            
+            # Fetch the rest in JQL search batches (one request per JIRA_SEARCH_BATCH_SIZE keys),
+            # throttled to stay under Atlassian rate limits
+            batches = await aiometer.run_all(
+                [
+                    functools.partial(
+                        self._search_jira_issues, jira_url, username, api_token,
+                        missing[start:start + JIRA_SEARCH_BATCH_SIZE]
+                    )
+                    for start in range(0, len(missing), JIRA_SEARCH_BATCH_SIZE)
+                ],
+                max_at_once=config.get("max_at_once", 8),
+                max_per_second=config.get("max_per_second", 5)
+            )
+            for batch in batches:
+                for issue in batch:
+                    found[issue["key"].upper()] = issue
+            
+            # A search returns moved issues under their new key and a failed batch returns
+            # nothing, so fetch anything still missing one issue at a time
+            unresolved = [issue_key for issue_key in missing if issue_key not in found]
+            if unresolved:
+                issues = await aiometer.run_all(
+                    [
+                        functools.partial(self._fetch_jira_issue, jira_url, username, api_token, issue_key)
+                        for issue_key in unresolved
+                    ],
+                    max_at_once=config.get("max_at_once", 8),
+                    max_per_second=config.get("max_per_second", 5)
+                )
+                for issue_key, issue in zip(unresolved, issues):
+                    if issue:
+                        found[issue_key] = issue
+            
+            for issue_key in missing:
+                if issue_key in found:
+                    await self.jira_cache.set(cache_keys[issue_key], orjson.dumps(found[issue_key]))
+            
+            # Search results come back in rank order; restore the requested order
+            results = [found.get(issue_key) for issue_key in issue_keys]
+            
+            for issue_data in results:
                 if issue_data:
                     context["issues"].append(issue_data)
+                    fields = issue_data.get("fields") or {}
                     
                     # Categorize by issue type
-                    if issue_data.get("fields", {}).get("issuetype", {}).get("name") == "Epic":
+                    issue_type = (fields.get("issuetype") or {}).get("name")
+                    if issue_type == "Epic":
                         context["epics"].append(issue_data)
-                    elif issue_data.get("fields", {}).get("issuetype", {}).get("name") == "Story":
+                    elif issue_type == "Story":
                         context["stories"].append(issue_data)
                     
                     # Extract acceptance criteria
-                    description = issue_data.get("fields", {}).get("description", "")
+                    # Jira sends an explicit null for issues without a description
+                    description = fields.get("description") or ""
                     if "Acceptance Criteria" in description:
                         criteria = self._extract_acceptance_criteria(description)
                         context["acceptance_criteria"].extend(criteria)
@@ -74,16 +830,59 @@ class ContextExtractor:
         except Exception as e:
             raise Exception(f"Jira context extraction failed: {str(e)}")
     
+    async def _jira_get(self, url: str, username: str, api_token: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """GET a Jira API URL, retrying rate limits, 5xx responses and transport errors"""
+        for attempt in range(JIRA_MAX_ATTEMPTS):
+            try:
+                response = await self.client.get(
+                    url,
+                    params=params,
+                    auth=(username, api_token),
+                    headers={"Accept": "application/json"}
+                )
+            except httpx.TransportError:
+                if attempt == JIRA_MAX_ATTEMPTS - 1:
+                    raise
+                response = None
+            
+            if response is not None and (response.status_code not in JIRA_RETRY_STATUSES or attempt == JIRA_MAX_ATTEMPTS - 1):
+                break
+            delay = _retry_delay(response, attempt)
+            print(f"⏳ Jira request retry {attempt + 1}/{JIRA_MAX_ATTEMPTS - 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        
+        response.raise_for_status()
+        return response
+    
+    async def _search_jira_issues(self, jira_url: str, username: str, api_token: str, issue_keys: List[str]) -> List[Dict]:
+        """Fetch a batch of Jira issues with a single JQL search"""
+        try:
+            response = await self._jira_get(
+                f"{jira_url}/rest/api/2/search",
+                username,
+                api_token,
+                params={
+                    "jql": f"key in ({','.join(issue_keys)})",
+                    "fields": JIRA_ISSUE_FIELDS,
+                    "maxResults": len(issue_keys),
+                    # Unknown keys become warnings instead of failing the whole batch
+                    "validateQuery": "warn"
+                }
+            )
+            return response.json().get("issues", [])
+        except Exception as e:
+            print(f"Failed to fetch Jira issues {', '.join(issue_keys)}: {str(e)}")
+            return []
+    
     async def _fetch_jira_issue(self, jira_url: str, username: str, api_token: str, issue_key: str) -> Optional[Dict]:
         """Fetch individual Jira issue"""
         try:
-            url = f"{jira_url}/rest/api/2/issue/{issue_key}"
-            response = self.session.get(
-                url,
-                auth=(username, api_token),
-                headers={"Accept": "application/json"}
+            response = await self._jira_get(
+                f"{jira_url}/rest/api/2/issue/{issue_key}",
+                username,
+                api_token,
+                params={"fields": JIRA_ISSUE_FIELDS}
             )
-            response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"Failed to fetch Jira issue {issue_key}: {str(e)}")
@@ -91,24 +890,10 @@ class ContextExtractor:
     
     def _extract_acceptance_criteria(self, description: str) -> List[str]:
         """Extract acceptance criteria from Jira description"""
-        criteria = []
-        lines = description.split('\n')
-        in_criteria_section = False
-        
-        for line in lines:
-            line = line.strip()
-            if "Acceptance Criteria" in line:
-                in_criteria_section = True
-                continue
-            elif in_criteria_section:
-                if line.startswith(('*', '-', '•')) or line.startswith(('1.', '2.', '3.')):
-                    criteria.append(line)
-                elif line == "":
-                    continue
-                else:
-                    break
-        
-        return criteria
+        section = _AC_SECTION_RE.search(description)
+        if not section:
+            return []
+        return _AC_ITEM_RE.findall(section.group(1))
     
     async def extract_url_context(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Extract context from web application"""
@@ -117,98 +902,151 @@ class ContextExtractor:
             if not url:
                 raise ValueError("URL is required")
             
-            # Fetch page content
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            cache_key = TTLCache.make_key(url=url)
+            cached = await self.url_cache.get(cache_key)
+            if cached is not None and cached["fresh_until"] > time.monotonic():
+                print(f"⚡ Using cached page context for {url}")
+                return orjson.loads(cached["context"])
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            request_headers = {}
+            if cached is not None:
+                if cached["etag"]:
+                    request_headers["If-None-Match"] = cached["etag"]
+                if cached["last_modified"]:
+                    request_headers["If-Modified-Since"] = cached["last_modified"]
             
-            context = {
-                "source": "url",
-                "url": url,
-                "title": soup.title.string if soup.title else "",
-                "forms": [],
-                "navigation": [],
-                "buttons": [],
-                "inputs": [],
-                "links": [],
-                "content_structure": {}
-            }
-            
-            # Extract forms
-            forms = soup.find_all('form')
-            for form in forms:
-                form_data = {
-                    "action": form.get('action', ''),
-                    "method": form.get('method', 'GET'),
-                    "inputs": []
-                }
+            # Fetch page content, refusing bodies over the cap instead of buffering them
+            async with self.client.stream("GET", url, headers=request_headers) as response:
+                if response.status_code == 304 and cached is not None:
+                    print(f"⚡ Page unchanged, reusing parsed context for {url}")
+                    cached["fresh_until"] = time.monotonic() + URL_CACHE_FRESH_SECONDS
+                    await self.url_cache.set(cache_key, cached)
+                    return orjson.loads(cached["context"])
+                response.raise_for_status()
                 
-                inputs = form.find_all(['input', 'select', 'textarea'])
-                for inp in inputs:
-                    input_data = {
-                        "type": inp.get('type', inp.name),
-                        "name": inp.get('name', ''),
-                        "id": inp.get('id', ''),
-                        "placeholder": inp.get('placeholder', ''),
-                        "required": inp.has_attr('required')
-                    }
-                    form_data["inputs"].append(input_data)
+                declared_length = response.headers.get("content-length")
+                if declared_length and declared_length.isdigit() and int(declared_length) > MAX_HTML_BYTES:
+                    raise ValueError(f"HTML body exceeds {MAX_HTML_BYTES} bytes")
                 
-                context["forms"].append(form_data)
-            
-            # Extract navigation
-            nav_elements = soup.find_all(['nav', 'ul', 'ol'], class_=lambda x: x and any(
-                keyword in x.lower() for keyword in ['nav', 'menu', 'breadcrumb']
-            ))
-            for nav in nav_elements:
-                links = nav.find_all('a')
-                nav_data = [{"text": link.get_text().strip(), "href": link.get('href', '')} for link in links]
-                context["navigation"].extend(nav_data)
-            
-            # Extract buttons
-            buttons = soup.find_all(['button', 'input[type="button"]', 'input[type="submit"]'])
-            for button in buttons:
-                button_data = {
-                    "text": button.get_text().strip() or button.get('value', ''),
-                    "type": button.get('type', 'button'),
-                    "class": button.get('class', [])
-                }
-                context["buttons"].append(button_data)
-            
-            # Extract all inputs
-            inputs = soup.find_all('input')
-            for inp in inputs:
-                input_data = {
-                    "type": inp.get('type', 'text'),
-                    "name": inp.get('name', ''),
-                    "id": inp.get('id', ''),
-                    "placeholder": inp.get('placeholder', ''),
-                    "required": inp.has_attr('required')
-                }
-                context["inputs"].append(input_data)
-            
-            # Extract links
-            links = soup.find_all('a', href=True)
-            for link in links[:50]:  # Limit to first 50 links
-                link_data = {
-                    "text": link.get_text().strip(),
-                    "href": link.get('href', ''),
-                    "title": link.get('title', '')
-                }
-                context["links"].append(link_data)
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) > MAX_HTML_BYTES:
+                        raise ValueError(f"HTML body exceeds {MAX_HTML_BYTES} bytes")
             
-            # Extract content structure
-            headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-            context["content_structure"]["headings"] = [
-                {"level": int(h.name[1]), "text": h.get_text().strip()} for h in headings
-            ]
+            # Parsing is CPU-bound; run it off the event loop so concurrent fetches keep moving
+            context = await asyncio.to_thread(self._parse_html_to_context, bytes(body), url)
             
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+            await self.url_cache.set(
+                cache_key,
+                {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "fresh_until": time.monotonic() + URL_CACHE_FRESH_SECONDS,
+                    # Stored serialized so every hit hands the caller its own copy to mutate
+                    "context": orjson.dumps(context)
+                },
+                # Without validators there's nothing to revalidate once the fresh window ends
+                ttl=None if etag or last_modified else URL_CACHE_FRESH_SECONDS
+            )
             return context
             
         except Exception as e:
             raise Exception(f"URL context extraction failed: {str(e)}")
     
+    def _parse_html_to_context(self, body: bytes, url: str) -> Dict[str, Any]:
+        """Build the URL context from a fetched HTML body (runs in a worker thread)"""
+        EncodingDetector, HTMLParser, visible_text = _html_tools()
+        
+        # Same encoding choice BeautifulSoup would make, then lxml builds the tree in C
+        detector = EncodingDetector(body, is_html=True)
+        parser = HTMLParser(recover=True, encoding=next(iter(detector.encodings), None))
+        # lxml rejects empty input and yields no root for whitespace; treat both as an empty page
+        parser.feed(detector.markup or b' ')
+        root = parser.close()
+        if root is None:
+            root = parser.makeelement('html')
+
+        def text(el) -> str:
+            return "".join(visible_text(el)).strip()
+
+        title = root.find('.//title')
+        context = {
+            "source": "url",
+            "url": url,
+            "title": (title.text if len(title) == 0 else None) if title is not None else "",
+            "forms": [],
+            "navigation": [],
+            "buttons": [],
+            "inputs": [],
+            "links": [],
+            "content_structure": {}
+        }
+
+        headings = context["content_structure"]["headings"] = []
+
+        # Walk the document once, letting lxml skip every tag we don't collect
+        for el in root.iter(*_URL_CONTEXT_TAGS):
+            name = el.tag
+            attrs = el.attrib
+
+            if name == 'form':
+                form_data = {
+                    "action": attrs.get('action', ''),
+                    "method": attrs.get('method', 'GET'),
+                    "inputs": []
+                }
+                for inp in el.iter('input', 'select', 'textarea'):
+                    form_data["inputs"].append({
+                        "type": inp.get('type', inp.tag),
+                        "name": inp.get('name', ''),
+                        "id": inp.get('id', ''),
+                        "placeholder": inp.get('placeholder', ''),
+                        "required": 'required' in inp.attrib
+                    })
+                context["forms"].append(form_data)
+
+            elif name == 'input':
+                if len(context["inputs"]) < MAX_URL_INPUTS:
+                    context["inputs"].append({
+                        "type": attrs.get('type', 'text'),
+                        "name": attrs.get('name', ''),
+                        "id": attrs.get('id', ''),
+                        "placeholder": attrs.get('placeholder', ''),
+                        "required": 'required' in attrs
+                    })
+
+            elif name == 'a':
+                if len(context["links"]) < MAX_URL_LINKS and 'href' in attrs:
+                    context["links"].append({
+                        "text": text(el),
+                        "href": attrs['href'],
+                        "title": attrs.get('title', '')
+                    })
+
+            elif name == 'button':
+                if len(context["buttons"]) < MAX_URL_BUTTONS:
+                    context["buttons"].append({
+                        "text": text(el) or attrs.get('value', ''),
+                        "type": attrs.get('type', 'button'),
+                        "class": attrs.get('class', '').split()
+                    })
+
+            elif name in _HEADING_TAGS:
+                headings.append({"level": int(name[1]), "text": text(el)})
+
+            else:
+                # nav/ul/ol: keep its links when the class marks it as navigation
+                classes = attrs.get('class')
+                if classes and _NAV_CLASS_RE.search(' '.join(classes.split())):
+                    context["navigation"].extend(
+                        {"text": text(link), "href": link.get('href', '')} for link in el.iter('a')
+                    )
+
+        return context
+    
     async def extract_file_context(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Extract context from uploaded files"""
         try:
@@ -228,16 +1066,19 @@ class ContextExtractor:
             
             # Read file content based on type
             if file_type == "yaml" or file_path.endswith(('.yml', '.yaml')):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    context["structured_data"] = yaml.safe_load(f)
-                    context["content"] = f.read()
+                structured_as = "yaml"
             elif file_type == "json" or file_path.endswith('.json'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    context["structured_data"] = json.load(f)
-                    context["content"] = f.read()
+                structured_as = "json"
             else:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    context["content"] = f.read()
+                structured_as = None
+            
+            abs_path = os.path.abspath(file_path)
+            stat = os.stat(abs_path)
+            text, structured = _load_file(abs_path, stat.st_mtime_ns, stat.st_size, structured_as)
+            context["content"] = text
+            if structured_as:
+                # _load_file's result is shared by every caller of the same file version
+                context["structured_data"] = copy.deepcopy(structured)
             
             return context
             
@@ -252,6 +1093,8 @@ class ContextAwareTestGenerator:
         self.openai_client = None
         self.anthropic_client = None
         self.integrations = integrations or []
+        # Last (context_sources list, source count, reduced context); the prompt and the mock fallback reduce the same context
+        self._reduced_memo: Optional[Tuple[List[Dict[str, Any]], int, Dict[str, Any]]] = None
         
         # Initialize clients from integrations
         self._initialize_clients_from_integrations()
@@ -259,18 +1102,19 @@ class ContextAwareTestGenerator:
     def _initialize_clients_from_integrations(self):
         """Initialize LLM clients from user integrations"""
         print(f"🔍 Initializing clients from {len(self.integrations)} integrations")
+        openai, AsyncAnthropic = _llm_libraries()
         for integration in self.integrations:
             print(f"🔍 Processing integration: {integration.integration_type}")
             if integration.integration_type == "openai" and openai:
                 # Decrypt credentials (stored as JSON)
                 try:
-                    credentials = json.loads(integration.encrypted_credentials)
+                    credentials = orjson.loads(integration.encrypted_credentials)
                     api_key = credentials.get("api_key")
                     if api_key:
                         # Initialize OpenAI client with minimal parameters
                         try:
                             # Initialize OpenAI client
-                            self.openai_client = openai.AsyncOpenAI(api_key=api_key)
+                            self.openai_client = _shared_llm_client("openai", api_key)
                             print("✅ OpenAI client initialized from integration")
                         except Exception as init_error:
                             print(f"❌ OpenAI client initialization failed: {init_error}")
@@ -280,13 +1124,13 @@ class ContextAwareTestGenerator:
                     print(f"❌ Failed to initialize OpenAI client: {e}")
                     self.openai_client = None
             
-            elif integration.integration_type == "anthropic" and Anthropic:
+            elif integration.integration_type == "anthropic" and AsyncAnthropic:
                 # Decrypt credentials (stored as JSON)
                 try:
-                    credentials = json.loads(integration.encrypted_credentials)
+                    credentials = orjson.loads(integration.encrypted_credentials)
                     api_key = credentials.get("api_key")
                     if api_key:
-                        self.anthropic_client = Anthropic(api_key=api_key)
+                        self.anthropic_client = _shared_llm_client("anthropic", api_key, credentials.get("base_url"))
                         print("✅ Anthropic client initialized from integration")
                 except Exception as e:
                     print(f"❌ Failed to initialize Anthropic client: {e}")
@@ -294,19 +1138,19 @@ class ContextAwareTestGenerator:
         # Fallback to environment variables if no integrations found
         if not self.openai_client and not self.anthropic_client:
             if openai:
-                api_key = os.getenv("OPENAI_API_KEY")
+                api_key = get_settings().OPENAI_API_KEY
                 if api_key:
                     try:
-                        self.openai_client = openai.AsyncOpenAI(api_key=api_key)
+                        self.openai_client = _shared_llm_client("openai", api_key)
                         print("✅ OpenAI client initialized from environment")
                     except Exception as e:
                         print(f"❌ Failed to initialize OpenAI client from environment: {e}")
             
-            if Anthropic:
-                api_key = os.getenv("ANTHROPIC_API_KEY")
+            if AsyncAnthropic:
+                api_key = get_settings().ANTHROPIC_API_KEY
                 if api_key:
                     try:
-                        self.anthropic_client = Anthropic(api_key=api_key)
+                        self.anthropic_client = _shared_llm_client("anthropic", api_key)
                         print("✅ Anthropic client initialized from environment")
                     except Exception as e:
                         print(f"❌ Failed to initialize Anthropic client from environment: {e}")
@@ -329,14 +1173,14 @@ class ContextAwareTestGenerator:
         # Generate tests using selected LLM
         if llm_provider == "openai" and self.openai_client:
             try:
-                generated_content = await self._generate_with_openai(prompt, config)
+                generated_content = await self._generate_cached(llm_provider, feature_name, prompt, context, config)
             except Exception as e:
                 print(f"❌ OpenAI generation failed: {e}")
                 print("⚠️  Falling back to mock content generation")
                 generated_content = self._generate_mock_content(feature_name, context, config)
         elif llm_provider == "anthropic" and self.anthropic_client:
             try:
-                generated_content = await self._generate_with_anthropic(prompt, config)
+                generated_content = await self._generate_cached(llm_provider, feature_name, prompt, context, config)
             except Exception as e:
                 print(f"❌ Anthropic generation failed: {e}")
                 print("⚠️  Falling back to mock content generation")
@@ -347,346 +1191,304 @@ class ContextAwareTestGenerator:
             generated_content = self._generate_mock_content(feature_name, context, config)
         
         # Parse and structure the generated content
-        test_files = self._parse_generated_content(generated_content, feature_name)
+        test_files = self._parse_generated_content(generated_content, feature_name, context)
         
         return test_files
     
+    async def _generate_cached(
+        self,
+        llm_provider: str,
+        feature_name: str,
+        prompt: str,
+        context: Dict[str, Any],
+        config: Dict[str, Any]
+    ) -> str:
+        """Serve the response from the exact or (opt-in) semantic cache, otherwise call the LLM and remember it"""
+        if llm_provider == "openai":
+            request, generate, label = self._openai_request(prompt, config), self._generate_with_openai, "OpenAI"
+        else:
+            request, generate, label = self._anthropic_request(prompt, config), self._generate_with_anthropic, "Anthropic"
+        
+        # Only near-deterministic requests are cached
+        if request["temperature"] > CACHEABLE_MAX_TEMPERATURE:
+            return await generate(request)
+        
+        cache_key = TTLCache.make_key(provider=llm_provider, **request)
+        cached = await llm_cache.get(cache_key)
+        if cached is not None:
+            print(f"⚡ Using cached {label} response ({llm_cache.hits} hits / {llm_cache.misses} misses)")
+            return cached
+        
+        # Semantic matching costs an embeddings call on every exact miss, so it's opt-in
+        vector = None
+        if self.openai_client and config.get("semantic_cache", False):
+            vector = await self._embed_prompt(prompt)
+        if vector:
+            scope = SemanticCache.scope(feature_name, context, config)
+            cached = await semantic_cache.lookup(scope, vector)
+            if cached is not None:
+                print("⚡ Using semantically cached LLM response")
+                return cached
+        
+        generated_content = await generate(request)
+        await llm_cache.set(cache_key, generated_content)
+        if vector:
+            semantic_cache.add(scope, vector, generated_content)
+        return generated_content
+    
+    async def _embed_prompt(self, prompt: str) -> Optional[List[float]]:
+        """Embed the prompt with OpenAI; returns None if embeddings are unavailable"""
+        # The shared preamble would dominate the vector and make unrelated prompts look alike
+        if prompt.startswith(GENERATION_PREAMBLE):
+            prompt = prompt[len(GENERATION_PREAMBLE):]
+        try:
+            response = await self.openai_client.embeddings.create(
+                model=SEMANTIC_CACHE_EMBEDDING_MODEL,
+                input=prompt[:SEMANTIC_CACHE_MAX_PROMPT_CHARS]
+            )
+            return response.data[0].embedding
+        except Exception as e:
+            print(f"⚠️  Prompt embedding failed, skipping semantic cache: {e}")
+            return None
+    
     def _generate_mock_content(self, feature_name: str, context: Dict[str, Any], config: Dict[str, Any]) -> str:
         """Generate mock test content for development when LLM is not available"""
         
-        clean_name = "".join(c for c in feature_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        clean_name = clean_name.replace(' ', '_').lower()
+        clean_name = _UNSAFE_NAME_CHARS_RE.sub('', feature_name).rstrip().replace(' ', '_').lower()
         
         # Extract URL from context if available
-        base_url = "https://example.com"
-        if context and context.get("context_sources"):
-            for source in context["context_sources"]:
-                if source.get("type") == "url" and source.get("extracted", {}).get("url"):
-                    base_url = source["extracted"]["url"]
-                    break
+        base_url = _extract_primary_url(context)[0] or "https://example.com"
         
-        mock_content = """# Mock Test Generation for: {feature_name}
-
-## Generated Test Files:
-
-```pom.xml
-<?xml version="1.0" encoding="UTF-8"?>
-<project xmlns="http://maven.apache.org/POM/4.0.0"
-         xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
-         xsi:schemaLocation="http://maven.apache.org/POM/4.0.0 
-         http://maven.apache.org/xsd/maven-4.0.0.xsd">
-    <modelVersion>4.0.0</modelVersion>
-    
-    <groupId>com.testgen</groupId>
-    <artifactId>selenium-cucumber-tests</artifactId>
-    <version>1.0.0</version>
-    <packaging>jar</packaging>
-    
-    <properties>
-        <maven.compiler.source>11</maven.compiler.source>
-        <maven.compiler.target>11</maven.compiler.target>
-        <project.build.sourceEncoding>UTF-8</project.build.sourceEncoding>
-    </properties>
-    
-    <dependencies>
-        <dependency>
-            <groupId>io.cucumber</groupId>
-            <artifactId>cucumber-java</artifactId>
-            <version>7.14.0</version>
-        </dependency>
-        <dependency>
-            <groupId>io.cucumber</groupId>
-            <artifactId>cucumber-junit</artifactId>
-            <version>7.14.0</version>
-        </dependency>
-        <dependency>
-            <groupId>org.seleniumhq.selenium</groupId>
-            <artifactId>selenium-java</artifactId>
-            <version>4.15.0</version>
-        </dependency>
-        <dependency>
-            <groupId>io.github.bonigarcia</groupId>
-            <artifactId>webdrivermanager</artifactId>
-            <version>5.5.3</version>
-        </dependency>
-        <dependency>
-            <groupId>org.junit.jupiter</groupId>
-            <artifactId>junit-jupiter</artifactId>
-            <version>5.10.0</version>
-        </dependency>
-    </dependencies>
-</project>
-```
-
-```src/test/java/TestRunner.java
-package com.testgen;
-
-import io.cucumber.junit.Cucumber;
-import io.cucumber.junit.CucumberOptions;
-import org.junit.runner.RunWith;
-
-@RunWith(Cucumber.class)
-@CucumberOptions(
-    features = "src/test/resources/features",
-    glue = "com.testgen.stepdefinitions",
-    plugin = {{"pretty", "html:target/cucumber-reports", "json:target/cucumber-reports/Cucumber.json"}},
-    monochrome = true
-)
-public class TestRunner {{
-}}
-```
-
-```src/test/resources/features/{clean_name}.feature
-Feature: {feature_name}
-  As a user
-  I want to test the {feature_name} functionality
-  So that I can ensure it works correctly
-
-  Scenario: Basic functionality test
-    Given I am on the page at "{base_url}"
-    When I perform the main action
-    Then I should see the expected result
-
-  Scenario: Error handling test
-    Given I am on the page at "{base_url}"
-    When I perform an invalid action
-    Then I should see an error message
-```
-
-```src/test/java/stepdefinitions/{clean_name}_steps.java
-package com.testgen.stepdefinitions;
-
-import io.cucumber.java.en.Given;
-import io.cucumber.java.en.When;
-import io.cucumber.java.en.Then;
-import org.junit.Assert;
-
-public class {clean_name_title}Steps {{
-    
-    @Given("I am on the page at {{string}}")
-    public void i_am_on_the_page(String url) {{
-        // TODO: Implement navigation to the specified URL
-        System.out.println("Navigating to " + url + "...");
-    }}
-    
-    @When("I perform the main action")
-    public void i_perform_the_main_action() {{
-        // TODO: Implement main action
-        System.out.println("Performing main action...");
-    }}
-    
-    @When("I perform an invalid action")
-    public void i_perform_an_invalid_action() {{
-        // TODO: Implement invalid action
-        System.out.println("Performing invalid action...");
-    }}
-    
-    @Then("I should see the expected result")
-    public void i_should_see_the_expected_result() {{
-        // TODO: Implement verification
-        Assert.assertTrue("Expected result not found", true);
-    }}
-    
-    @Then("I should see an error message")
-    public void i_should_see_an_error_message() {{
-        // TODO: Implement error verification
-        Assert.assertTrue("Error message not found", true);
-    }}
-}}
-```
-
-```README.md
-# {feature_name} Test Suite
-
-## Overview
-This test suite was generated by TestGen AI for testing the {feature_name} functionality.
-
-## Prerequisites
-- Java 11 or higher
-- Maven 3.6 or higher
-- Chrome/Firefox/Edge browser
-
-## Running Tests
-```bash
-mvn clean test
-```
-
-## Test Reports
-Test reports will be generated in the `target/cucumber-reports` directory.
-
-## Note
-This is a mock test suite generated for development purposes. 
-To generate real test cases, configure your LLM API keys in the environment variables.
-```
-
-## Context Information Used:
-{context_json}
-
-## Configuration Used:
-{config_json}
-""".format(
+        return _MOCK_TEMPLATE.format(
             feature_name=feature_name,
             clean_name=clean_name,
             clean_name_title=clean_name.title().replace('_', ''),
             base_url=base_url,
-            context_json=json.dumps(context, indent=2),
-            config_json=json.dumps(config, indent=2)
+            # Same capped summary the prompt embeds, so raw page/file content is never dumped
+            context_json=orjson.dumps(self._reduce_context(context), option=orjson.OPT_INDENT_2).decode(),
+            config_json=orjson.dumps(config, option=orjson.OPT_INDENT_2).decode()
         )
-        
-        return mock_content
     
     def _build_generation_prompt(self, feature_name: str, context: Dict[str, Any], config: Dict[str, Any]) -> str:
         """Build comprehensive prompt for test generation"""
         
-        prompt = f"""
-You are an expert QA automation engineer. Generate comprehensive Cucumber Selenium Java test cases for the feature: "{feature_name}".
+        # Static instructions first, per-request context after, so provider prompt caches can reuse the prefix
+        parts = [GENERATION_PREAMBLE, f"""
+## Feature Under Test: "{feature_name}"
 
 ## Context Information:
 
 ### Project Context:
-{json.dumps(context.get('project_context', {}), indent=2)}
+{orjson.dumps(context.get('project_context', {}), option=orjson.OPT_INDENT_2).decode()}
 
 ### Context Sources:
-"""
+"""]
+        append = parts.append
         
         # Add context from different sources
-        for source in context.get('context_sources', []):
-            source_type = source.get('type')
-            extracted = source.get('extracted', {})
+        for source in self._reduce_context(context)['context_sources']:
+            source_type = source['type']
             
             if source_type == 'jira':
-                prompt += f"""
-### Jira Issues:
-"""
-                for issue in extracted.get('issues', []):
-                    fields = issue.get('fields', {})
-                    prompt += f"""
-- **{issue.get('key')}**: {fields.get('summary', '')}
-  - Description: {fields.get('description', '')}
-  - Issue Type: {fields.get('issuetype', {}).get('name', '')}
-  - Status: {fields.get('status', {}).get('name', '')}
-"""
+                append("""
+### Jira Issues:
+""")
+                for issue in source['issues']:
+                    append(f"""
+- **{issue['key']}**: {issue['summary']}
+  - Description: {issue['description']}
+  - Issue Type: {issue['issue_type']}
+  - Status: {issue['status']}
+""")
                 
-                if extracted.get('acceptance_criteria'):
-                    prompt += f"""
+                if source['acceptance_criteria']:
+                    append("""
 ### Acceptance Criteria:
-"""
-                    for criteria in extracted['acceptance_criteria']:
-                        prompt += f"- {criteria}\n"
+""")
+                    parts.extend(f"- {criteria}\n" for criteria in source['acceptance_criteria'])
             
             elif source_type == 'url':
-                url = extracted.get('url', '')
-                title = extracted.get('title', '')
-                forms = extracted.get('forms', [])
-                navigation = extracted.get('navigation', [])
-                buttons = extracted.get('buttons', [])
-                inputs = extracted.get('inputs', [])
-                
-                prompt += f"""
+                append(f"""
 ### Web Application Analysis:
-- **Target URL**: {url}
-- **Page Title**: {title}
-- **Forms Found**: {len(forms)} forms
-- **Navigation Items**: {len(navigation)} items
-- **Buttons Found**: {len(buttons)} buttons
-- **Input Fields**: {len(inputs)} input fields
+- **Target URL**: {source['url']}
+- **Page Title**: {source['title']}
+- **Forms Found**: {source['form_count']} forms
+- **Navigation Items**: {source['navigation_count']} items
+- **Buttons Found**: {source['button_count']} buttons
+- **Input Fields**: {source['input_count']} input fields
 
 ### Detailed Form Analysis:
-"""
+""")
                 
                 # Add detailed form information
-                for i, form in enumerate(forms[:3]):  # Limit to first 3 forms
-                    form_inputs = form.get('inputs', [])
-                    prompt += f"""
+                for i, form in enumerate(source['forms']):
+                    append(f"""
 **Form {i+1}**:
-- Action URL: {form.get('action', '')}
-- Method: {form.get('method', 'GET')}
-- Input Fields ({len(form_inputs)}):
-"""
-                    for j, inp in enumerate(form_inputs[:10]):  # Limit to first 10 inputs per form
-                        prompt += f"  - {inp.get('type', 'text')} field: name='{inp.get('name', '')}' id='{inp.get('id', '')}' placeholder='{inp.get('placeholder', '')}' {'(required)' if inp.get('required') else ''}\n"
+- Action URL: {form['action']}
+- Method: {form['method']}
+- Input Fields ({form['input_count']}):
+""")
+                    for inp in form['inputs']:
+                        required = '(required)' if inp['required'] else ''
+                        append(f"  - {inp['type']} field: name='{inp['name']}' id='{inp['id']}' placeholder='{inp['placeholder']}' {required}\n")
                 
                 # Add navigation details
-                if navigation:
-                    prompt += f"""
+                if source['navigation']:
+                    append("""
 ### Navigation Structure:
-"""
-                    for nav_item in navigation[:10]:  # Limit to first 10 nav items
-                        prompt += f"- {nav_item.get('text', '')} -> {nav_item.get('href', '')}\n"
+""")
+                    parts.extend(f"- {nav_item['text']} -> {nav_item['href']}\n" for nav_item in source['navigation'])
                 
                 # Add button details
-                if buttons:
-                    prompt += f"""
+                if source['buttons']:
+                    append("""
 ### Interactive Elements:
-"""
-                    for button in buttons[:10]:  # Limit to first 10 buttons
-                        prompt += f"- {button.get('text', '')} ({button.get('type', 'button')})\n"
+""")
+                    parts.extend(f"- {button['text']} ({button['type']})\n" for button in source['buttons'])
             
             elif source_type == 'file':
-                prompt += f"""
+                append(f"""
 ### File Content:
-- File: {extracted.get('file_name', '')}
-- Type: {extracted.get('file_type', '')}
-- Content Preview: {extracted.get('content', '')[:500]}...
-"""
+- File: {source['file_name']}
+- Type: {source['file_type']}
+- Content Preview: {source['content_preview']}...
+""")
         
-        prompt += f"""
-
-## Test Generation Requirements:
-
-1. **Generate a complete Maven project structure** with:
-   - pom.xml with all necessary dependencies
-   - TestRunner class for Cucumber execution
-   - Page Object Model classes
-   - Step definition classes
-   - Feature files with Gherkin scenarios
-
-2. **Test Coverage**:
-   - Happy path scenarios
-   - Edge cases and error conditions
-   - Security tests (if applicable)
-   - Performance considerations
-   - Cross-browser compatibility
-
-3. **Code Quality**:
-   - Follow Java best practices
-   - Use proper naming conventions
-   - Include comprehensive comments
-   - Implement proper error handling
-   - Use Page Object Model pattern
-
-4. **Configuration**:
-   - Support for different browsers (Chrome, Firefox, Edge)
-   - Configurable test data
-   - Environment-specific configurations
-   - Parallel execution support
-
-## Output Format:
-Generate the complete test suite as a structured response with each file clearly marked with its path and content.
-
-Generate comprehensive, production-ready test cases that cover all the requirements and context provided.
-"""
+        return "".join(parts)
+    
+    def _reduce_context(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Cut context down to just what the prompt embeds, memoized per generator"""
+        context_sources = context.get('context_sources', [])
+        memo = self._reduced_memo
+        # The memo holds the list itself, so an identity match can't be a recycled id
+        if memo is not None and memo[0] is context_sources and memo[1] == len(context_sources):
+            return memo[2]
+        
+        def clip(value: Any) -> str:
+            return str(value or '')[:PROMPT_FIELD_MAX_CHARS]
         
-        return prompt
+        sources = []
+        for source in context_sources:
+            source_type = source.get('type')
+            extracted = source.get('extracted', {})
+            
+            if source_type == 'jira':
+                issues = []
+                for issue in extracted.get('issues', []):
+                    fields = issue.get('fields', {})
+                    issues.append({
+                        "key": issue.get('key'),
+                        "summary": clip(fields.get('summary')),
+                        "description": clip(fields.get('description')),
+                        "issue_type": (fields.get('issuetype') or {}).get('name', ''),
+                        "status": (fields.get('status') or {}).get('name', '')
+                    })
+                sources.append({
+                    "type": source_type,
+                    "issues": issues,
+                    "acceptance_criteria": [clip(criteria) for criteria in extracted.get('acceptance_criteria', [])]
+                })
+            
+            elif source_type == 'url':
+                forms = extracted.get('forms', [])
+                navigation = extracted.get('navigation', [])
+                buttons = extracted.get('buttons', [])
+                sources.append({
+                    "type": source_type,
+                    "url": extracted.get('url', ''),
+                    "title": clip(extracted.get('title')),
+                    "form_count": len(forms),
+                    "navigation_count": len(navigation),
+                    "button_count": len(buttons),
+                    "input_count": len(extracted.get('inputs', [])),
+                    "forms": [
+                        {
+                            "action": form.get('action', ''),
+                            "method": form.get('method', 'GET'),
+                            "input_count": len(form.get('inputs', [])),
+                            "inputs": [
+                                {
+                                    "type": inp.get('type', 'text'),
+                                    "name": inp.get('name', ''),
+                                    "id": inp.get('id', ''),
+                                    "placeholder": clip(inp.get('placeholder')),
+                                    "required": bool(inp.get('required'))
+                                }
+                                for inp in form.get('inputs', [])[:PROMPT_MAX_FORM_INPUTS]
+                            ]
+                        }
+                        for form in forms[:PROMPT_MAX_FORMS]
+                    ],
+                    "navigation": [
+                        {"text": clip(nav_item.get('text')), "href": nav_item.get('href', '')}
+                        for nav_item in navigation[:PROMPT_MAX_ITEMS]
+                    ],
+                    "buttons": [
+                        {"text": clip(button.get('text')), "type": button.get('type', 'button')}
+                        for button in buttons[:PROMPT_MAX_ITEMS]
+                    ]
+                })
+            
+            elif source_type == 'file':
+                sources.append({
+                    "type": source_type,
+                    "file_name": extracted.get('file_name', ''),
+                    "file_type": extracted.get('file_type', ''),
+                    "content_preview": (extracted.get('content') or '')[:500]
+                })
+        
+        reduced = {"context_sources": sources}
+        self._reduced_memo = (context_sources, len(context_sources), reduced)
+        return reduced
+    
+    @staticmethod
+    def _openai_request(prompt: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Chat completion parameters for a prompt; also the exact-match cache key"""
+        return {
+            # Use gpt-3.5-turbo as default since it's more widely available
+            "model": config.get("model", "gpt-3.5-turbo"),
+            "messages": [
+                {"role": "system", "content": "You are an expert QA automation engineer specializing in Cucumber Selenium Java test automation."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": config.get("max_tokens", 4000),
+            "temperature": config.get("temperature", 0.1)
+        }
+    
+    @staticmethod
+    def _anthropic_request(prompt: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Messages API parameters for a prompt; also the exact-match cache key"""
+        if prompt.startswith(GENERATION_PREAMBLE):
+            # Mark the static preamble as a cache breakpoint so only the context is re-processed
+            content = [
+                {"type": "text", "text": GENERATION_PREAMBLE, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": prompt[len(GENERATION_PREAMBLE):]}
+            ]
+        else:
+            content = prompt
+        return {
+            "model": config.get("model", "claude-3-sonnet-20240229"),
+            "messages": [
+                {"role": "user", "content": content}
+            ],
+            "max_tokens": config.get("max_tokens", 4000),
+            "temperature": config.get("temperature", 0.1)
+        }
     
-    async def _generate_with_openai(self, prompt: str, config: Dict[str, Any]) -> str:
+    async def _generate_with_openai(self, request: Dict[str, Any]) -> str:
         """Generate tests using OpenAI"""
         try:
-            # Use gpt-3.5-turbo as default since it's more widely available
-            model = config.get("model", "gpt-3.5-turbo")
-            print(f"🤖 Using OpenAI model: {model}")
-            
-            response = await self.openai_client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are an expert QA automation engineer specializing in Cucumber Selenium Java test automation."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=config.get("max_tokens", 4000),
-                temperature=config.get("temperature", 0.1)
-            )
+            print(f"🤖 Using OpenAI model: {request['model']}")
             
-            return response.choices[0].message.content
+            chunks = []
+            stream = await self.openai_client.chat.completions.create(**request, stream=True)
+            
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    chunks.append(delta)
+            
+            return ''.join(chunks)
             
         except Exception as e:
             error_msg = str(e)
@@ -695,306 +1497,102 @@ Generate comprehensive, production-ready test cases that cover all the requireme
             else:
                 raise Exception(f"OpenAI generation failed: {error_msg}")
     
-    async def _generate_with_anthropic(self, prompt: str, config: Dict[str, Any]) -> str:
+    async def _generate_with_anthropic(self, request: Dict[str, Any]) -> str:
         """Generate tests using Anthropic Claude"""
         try:
-            response = self.anthropic_client.messages.create(
-                model=config.get("model", "claude-3-sonnet-20240229"),
-                max_tokens=config.get("max_tokens", 4000),
-                temperature=config.get("temperature", 0.1),
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            chunks = []
+            async with self.anthropic_client.messages.stream(**request) as stream:
+                async for text in stream.text_stream:
+                    chunks.append(text)
             
-            return response.content[0].text
+            return ''.join(chunks)
             
         except Exception as e:
             raise Exception(f"Anthropic generation failed: {str(e)}")
     
-    def _parse_generated_content(self, content: str, feature_name: str) -> Dict[str, str]:
+    def _parse_generated_content(self, content: str, feature_name: str, context: Dict[str, Any] = None) -> Dict[str, str]:
         """Parse generated content into structured files"""
         
         files = {}
         current_file = None
-        current_content = []
-        
-        lines = content.split('\n')
+        body_start = 0
         
-        for line in lines:
-            # Check for file markers
-            if line.startswith('```') and ':' in line:
+        # Only fence lines drive the state machine; file bodies are sliced straight out of content
+        for fence in _FENCE_LINE_RE.finditer(content):
+            line = fence.group()
+            has_body = fence.start() > body_start
+            
+            if ':' in line:
                 # Save previous file
-                if current_file and current_content:
-                    files[current_file] = '\n'.join(current_content)
+                if current_file and has_body:
+                    files[current_file] = content[body_start:fence.start() - 1]
                 
                 # Start new file
                 file_path = line.replace('```', '').strip()
                 if ':' in file_path:
                     file_path = file_path.split(':', 1)[1].strip()
                 current_file = file_path
-                current_content = []
-                continue
-            
-            elif line.startswith('```') and not current_file:
-                continue
+                body_start = fence.end() + 1
             
-            elif line.startswith('```') and current_file:
+            elif current_file:
                 # End of current file
-                if current_content:
-                    files[current_file] = '\n'.join(current_content)
+                if has_body:
+                    files[current_file] = content[body_start:fence.start() - 1]
                 current_file = None
-                current_content = []
-                continue
-            
-            # Add content to current file
-            if current_file:
-                current_content.append(line)
         
         # Save last file
-        if current_file and current_content:
-            files[current_file] = '\n'.join(current_content)
+        if current_file and body_start <= len(content):
+            files[current_file] = content[body_start:]
         
         # If no structured files found, create default structure
         if not files:
-            files = self._create_default_test_structure(feature_name, content)
+            files = self._create_default_test_structure(feature_name, content, context)
         
         return files
     
-    def _create_default_test_structure(self, feature_name: str, content: str) -> Dict[str, str]:
+    def _create_default_test_structure(self, feature_name: str, content: str, context: Dict[str, Any] = None) -> Dict[str, str]:
         """Create default test structure if parsing fails"""
         
         # Clean feature name for file names
-        clean_name = "".join(c for c in feature_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        clean_name = clean_name.replace(' ', '_').lower()
+        clean_name = _UNSAFE_NAME_CHARS_RE.sub('', feature_name).rstrip().replace(' ', '_').lower()
         
-        files = {
-            f"pom.xml": self._get_default_pom(),
-            f"src/test/java/TestRunner.java": self._get_default_test_runner(clean_name),
-            f"src/test/java/pages/BasePage.java": self._get_default_base_page(),
-            f"src/test/java/stepdefinitions/{clean_name}_steps.java": self._get_default_step_definitions(clean_name),
-            f"src/test/resources/features/{clean_name}.feature": self._get_default_feature_file(clean_name, content, context),
-            f"src/test/resources/config.properties": self._get_default_config(context),
-            f"README.md": self._get_default_readme(clean_name)
+        base_url, page_title = _extract_primary_url(context)
+        args = {"clean_name": clean_name, "content": content, "base_url": base_url, "page_title": page_title}
+        return {
+            path.format(clean_name=clean_name): getattr(self, getter)(*(args[name] for name in arg_names))
+            for path, getter, arg_names in _DEFAULT_FILE_LAYOUT
         }
-        
-        return files
     
     def _get_default_pom(self) -> str:
-        return """<?xml version="1.0" encoding="UTF-8"?>
-<project xmlns="http://maven.apache.org/POM/4.0.0"
-         xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
-         xsi:schemaLocation="http://maven.apache.org/POM/4.0.0 
-         http://maven.apache.org/xsd/maven-4.0.0.xsd">
-    <modelVersion>4.0.0</modelVersion>
-    
-    <groupId>com.testgen</groupId>
-    <artifactId>selenium-cucumber-tests</artifactId>
-    <version>1.0.0</version>
-    <packaging>jar</packaging>
-    
-    <properties>
-        <maven.compiler.source>11</maven.compiler.source>
-        <maven.compiler.target>11</maven.compiler.target>
-        <project.build.sourceEncoding>UTF-8</project.build.sourceEncoding>
-    </properties>
-    
-    <dependencies>
-        <dependency>
-            <groupId>io.cucumber</groupId>
-            <artifactId>cucumber-java</artifactId>
-            <version>7.14.0</version>
-        </dependency>
-        <dependency>
-            <groupId>io.cucumber</groupId>
-            <artifactId>cucumber-junit</artifactId>
-            <version>7.14.0</version>
-        </dependency>
-        <dependency>
-            <groupId>org.seleniumhq.selenium</groupId>
-            <artifactId>selenium-java</artifactId>
-            <version>4.15.0</version>
-        </dependency>
-        <dependency>
-            <groupId>io.github.bonigarcia</groupId>
-            <artifactId>webdrivermanager</artifactId>
-            <version>5.5.3</version>
-        </dependency>
-        <dependency>
-            <groupId>org.junit.jupiter</groupId>
-            <artifactId>junit-jupiter</artifactId>
-            <version>5.10.0</version>
-        </dependency>
-    </dependencies>
-    
-    <build>
-        <plugins>
-            <plugin>
-                <groupId>org.apache.maven.plugins</groupId>
-                <artifactId>maven-compiler-plugin</artifactId>
-                <version>3.11.0</version>
-            </plugin>
-            <plugin>
-                <groupId>org.apache.maven.plugins</groupId>
-                <artifactId>maven-surefire-plugin</artifactId>
-                <version>3.1.2</version>
-            </plugin>
-        </plugins>
-    </build>
-</project>"""
+        return _DEFAULT_POM_XML
     
     def _get_default_test_runner(self, feature_name: str) -> str:
-        return f"""package com.testgen;
-
-import io.cucumber.junit.Cucumber;
-import io.cucumber.junit.CucumberOptions;
-import org.junit.runner.RunWith;
-
-@RunWith(Cucumber.class)
-@CucumberOptions(
-    features = "src/test/resources/features",
-    glue = "com.testgen.stepdefinitions",
-    plugin = {{"pretty", "html:target/cucumber-reports", "json:target/cucumber-reports/Cucumber.json"}},
-    monochrome = true
-)
-public class TestRunner {{
-}}"""
+        return _DEFAULT_TEST_RUNNER
     
     def _get_default_base_page(self) -> str:
-        return """package com.testgen.pages;
-
-import org.openqa.selenium.WebDriver;
-import org.openqa.selenium.WebElement;
-import org.openqa.selenium.support.PageFactory;
-import org.openqa.selenium.support.ui.WebDriverWait;
-import org.openqa.selenium.support.ui.ExpectedConditions;
-import java.time.Duration;
-
-public class BasePage {
-    protected WebDriver driver;
-    protected WebDriverWait wait;
-    
-    public BasePage(WebDriver driver) {
-        this.driver = driver;
-        this.wait = new WebDriverWait(driver, Duration.ofSeconds(10));
-        PageFactory.initElements(driver, this);
-    }
-    
-    protected void waitForElement(WebElement element) {
-        wait.until(ExpectedConditions.visibilityOf(element));
-    }
-    
-    protected void clickElement(WebElement element) {
-        waitForElement(element);
-        element.click();
-    }
-    
-    protected void enterText(WebElement element, String text) {
-        waitForElement(element);
-        element.clear();
-        element.sendKeys(text);
-    }
-}"""
+        return _DEFAULT_BASE_PAGE
     
     def _get_default_step_definitions(self, feature_name: str) -> str:
-        return f"""package com.testgen.stepdefinitions;
-
-import io.cucumber.java.en.Given;
-import io.cucumber.java.en.When;
-import io.cucumber.java.en.Then;
-import io.cucumber.java.en.And;
-import org.junit.Assert;
-
-public class {feature_name.title().replace('_', '')}Steps {{
-    
-    @Given("I am on the application homepage")
-    public void i_am_on_the_application_homepage() {{
-        // Implementation for navigating to homepage
-    }}
-    
-    @When("I perform the main action")
-    public void i_perform_the_main_action() {{
-        // Implementation for main action
-    }}
-    
-    @Then("I should see the expected result")
-    public void i_should_see_the_expected_result() {{
-        // Implementation for verification
-        Assert.assertTrue("Expected result not found", true);
-    }}
-}}"""
+        return _render_step_definitions(feature_name)
     
-    def _get_default_feature_file(self, feature_name: str, content: str, context: Dict[str, Any] = None) -> str:
-        # Extract URL from context if available
-        base_url = "the application homepage"
-        if context and context.get("context_sources"):
-            for source in context["context_sources"]:
-                if source.get("type") == "url" and source.get("extracted", {}).get("url"):
-                    url = source["extracted"]["url"]
-                    title = source["extracted"].get("title", "")
-                    base_url = f"the {title} page at {url}" if title else f"the page at {url}"
-                    break
+    def _get_default_feature_file(self, feature_name: str, content: str, base_url: str, page_title: str) -> str:
+        if not base_url:
+            base_url = "the application homepage"
+        elif page_title:
+            base_url = f"the {page_title} page at {base_url}"
+        else:
+            base_url = f"the page at {base_url}"
         
-        return f"""Feature: {feature_name.replace('_', ' ').title()}
-  As a user
-  I want to test the {feature_name.replace('_', ' ')} functionality
-  So that I can ensure it works correctly
-
-  Scenario: Basic functionality test
-    Given I am on {base_url}
-    When I perform the main action
-    Then I should see the expected result
-
-  Scenario: Error handling test
-    Given I am on {base_url}
-    When I perform an invalid action
-    Then I should see an error message
-
-  # Generated based on context:
-  # {content[:200]}..."""
+        feature_spaced = feature_name.replace('_', ' ')
+        return _DEFAULT_FEATURE_FILE_TEMPLATE.format(
+            feature_title=feature_spaced.title(),
+            feature_spaced=feature_spaced,
+            scenarios=_render_default_scenarios(base_url),
+            content_preview=content[:200]
+        )
     
-    def _get_default_config(self, context: Dict[str, Any] = None) -> str:
-        # Extract URL from context if available
-        base_url = "https://example.com"
-        if context and context.get("context_sources"):
-            for source in context["context_sources"]:
-                if source.get("type") == "url" and source.get("extracted", {}).get("url"):
-                    base_url = source["extracted"]["url"]
-                    break
-        
-        return f"""# Test Configuration
-browser=chrome
-base.url={base_url}
-timeout=10
-headless=false
-
-# Browser configurations
-chrome.driver.path=
-firefox.driver.path=
-edge.driver.path=
-
-# Test data
-test.data.path=src/test/resources/testdata/"""
+    def _get_default_config(self, base_url: str) -> str:
+        return "".join((_DEFAULT_CONFIG_HEAD, base_url or "https://example.com", _DEFAULT_CONFIG_TAIL))
     
     def _get_default_readme(self, feature_name: str) -> str:
-        return f"""# {feature_name.replace('_', ' ').title()} Test Suite
-
-## Overview
-This test suite was generated by TestGen AI for testing the {feature_name.replace('_', ' ')} functionality.
-
-## Prerequisites
-- Java 11 or higher
-- Maven 3.6 or higher
-- Chrome/Firefox/Edge browser
-
-## Running Tests
-```bash
-mvn clean test
-```
-
-## Test Reports
-Test reports will be generated in the `target/cucumber-reports` directory.
-
-## Configuration
-Update `src/test/resources/config.properties` with your application settings.
-"""
+        return _render_readme(feature_name)